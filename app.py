@@ -1,6 +1,7 @@
 import numpy as np
 import threading
 import time
+import os
 
 import config
 import controllers
@@ -35,6 +36,11 @@ class App:
         self.statesObjectsLocker = threading.Lock()
         self.safetyKillEvent = threading.Event()
 
+        self.motorsDataLocker = threading.Lock()
+        self.motorsData = None
+        self.newMotorsDataEvent = threading.Event()
+        self.newQCdEvent = threading.Event()
+
         self.currentState = None
         self.wateringCounter = 0
 
@@ -85,30 +91,67 @@ class App:
         self.safetyThread, self.safetyThreadKillEvent = self.threadManager.run(safetyChecking, config.SAFETY_THREAD_NAME, False, True, doPrint = True)
     
     def motorControlLayer(self):
-        """Motors control layer with reading, recalculating and sending data to the motors.
+        """Motors control layer with reading, recalculating and sending data to the motors. Communication with motors runs in its own thread, so that
+        controller's calculations overlap with transactions on the serial bus. Velocities, calculated from data of one reading, are sent to the motors
+        at the beginning of the next communication cycle.
         """
+        def motorsCommunicationLoop(killEvent):
+            self.__setRealTimeScheduling(config.MOTORS_COMMUNICATION_THREAD_CPU_CORE)
+            self.motorDriver.setBusWatchdog(15)
+            period = 1 / config.CONTROLLER_FREQUENCY
+            nextCycleTime = time.perf_counter()
+            while True:
+                if killEvent.is_set():
+                    break
+
+                # Sending velocities to motors. Only newly calculated velocities are sent, so that motors' watchdog stops the motors if controller stalls.
+                if self.newQCdEvent.is_set():
+                    self.newQCdEvent.clear()
+                    with self.motorsDataLocker:
+                        qCd = self.qCd
+                    self.motorDriver.syncWriteMotorsVelocitiesInLegs(qCd)
+
+                # Reading data from motors.
+                try:
+                    motorsData = self.motorDriver.syncReadMotorsData()
+                except KeyError:
+                    print("Reading error.")
+                    continue
+                with self.motorsDataLocker:
+                    self.motorsData = motorsData
+                self.newMotorsDataEvent.set()
+
+                # Enforce desired frequency. Cycles run on fixed deadlines, so that time spent between cycles does not accumulate into drift.
+                nextCycleTime += period
+                currentTime = time.perf_counter()
+                if currentTime > nextCycleTime:
+                    # Cycle overran its deadline - start next one immediately, without trying to catch up.
+                    nextCycleTime = currentTime
+                # Sleep until deadline, so that thread does not spin (at real-time priority) between cycles.
+                time.sleep(max(0.0, nextCycleTime - time.perf_counter()))
+
         def controlLoop(killEvent):
             fBuffer = np.zeros((10, spider.NUMBER_OF_LEGS, 3), dtype = np.float32)
             tauBuffer = np.zeros((10, spider.NUMBER_OF_LEGS, 3), dtype = np.float32)
             tauCounter = 0
             fCounter = 0
             init = True
-            self.motorDriver.setBusWatchdog(15)
+            self.__setRealTimeScheduling(config.CONTROL_THREAD_CPU_CORE)
+            period = 1 / config.CONTROLLER_FREQUENCY
+            legOrigin = config.LEG_ORIGIN
             while True:
-                startTime = time.perf_counter()
-
                 if killEvent.is_set():
                     break
-                
-                # Reading data from motors.
-                try:
-                    qA, iA, hwErrors, temperatures = self.motorDriver.syncReadMotorsData()
-                except KeyError:
-                    print("Reading error.")
+
+                # Waiting for new data from motors.
+                if not self.newMotorsDataEvent.wait(timeout = period):
                     continue
+                self.newMotorsDataEvent.clear()
+                with self.motorsDataLocker:
+                    qA, iA, hwErrors, temperatures = self.motorsData
 
                 # Calculating input data for controller.
-                xA = kin.allLegsPositions(qA, config.LEG_ORIGIN)
+                xA = kin.allLegsPositions(qA, legOrigin)
                 tau, f = dyn.getTorquesAndForcesOnLegsTips(qA, iA, self.pumpsBnoArduino.getGravityVector())
                 tauMean, tauBuffer, tauCounter = mathtools.runningAverage(tauBuffer, tauCounter, tau)
                 fMean, fBuffer, fCounter = mathtools.runningAverage(fBuffer, fCounter, f)
@@ -125,15 +168,12 @@ class App:
                 if init:
                     init = False
 
-                # Sending velocities to motors.
-                self.motorDriver.syncWriteMotorsVelocitiesInLegs(qCd)
-
-                # Enforce desired frequency.
-                elapsedTime = time.perf_counter() - startTime
-                while elapsedTime < (1 / config.CONTROLLER_FREQUENCY):
-                    elapsedTime = time.perf_counter() - startTime
-                    time.sleep(0)
+                # Publishing velocities for communication thread.
+                with self.motorsDataLocker:
+                    self.qCd = qCd
+                self.newQCdEvent.set()
 
+        self.motorsCommunicationThread, self.motorsCommunicationThreadKillEvent = self.threadManager.run(motorsCommunicationLoop, config.MOTORS_COMMUNICATION_THREAD_NAME, False, True, doPrint = True)
         self.motorControlThread, self.motorControlThreadKillEvent = self.threadManager.run(controlLoop, config.CONTROL_THREAD_NAME, False, True, doPrint = True)
 
     def spiderStatesManager(self, state, workingArs = None):
@@ -193,7 +233,7 @@ class App:
 
                 if step == 0:
                     self.motorsVelocityController.moveLegsSync(currentLegsMovingOrder, xA, currentPinsPositions, config.GLOBAL_ORIGIN, 5, config.MINJERK_TRAJECTORY, pose)
-                    updateDictThread = self.threadManager.run(self.jsonFileManager.updateWholeDict, config.UPDATE_DICT_THREAD_NAME, True, True, False, False, (pose, currentPinsPositions, currentLegsMovingOrder, ))
+                    updateDictThread = self.threadManager.run(self.jsonFileManager.updateWholeDict, config.UPDATE_DICT_THREAD_NAME, True, True, False, False, (pose, currentPinsPositions, currentLegsMovingOrder, ), niceValue = config.NON_CRITICAL_THREADS_NICE_VALUE)
                     if self.safetyKillEvent.wait(timeout = 5.5):
                         return
                     updateDictThread.join()
@@ -210,7 +250,7 @@ class App:
 
                 previousPinsPositions = np.array(pinsInstructions[step - 1, :, 1:])
                 self.motorsVelocityController.moveLegsSync(currentLegsMovingOrder, xA, previousPinsPositions, config.GLOBAL_ORIGIN, 2.5, config.MINJERK_TRAJECTORY, pose)
-                updateDictThread = self.threadManager.run(self.jsonFileManager.updateWholeDict, config.UPDATE_DICT_THREAD_NAME, True, True, False, False, (pose, previousPinsPositions, currentLegsMovingOrder, ))
+                updateDictThread = self.threadManager.run(self.jsonFileManager.updateWholeDict, config.UPDATE_DICT_THREAD_NAME, True, True, False, False, (pose, previousPinsPositions, currentLegsMovingOrder, ), niceValue = config.NON_CRITICAL_THREADS_NICE_VALUE)
                 if self.safetyKillEvent.wait(timeout = 3.0):
                     print("UNSUCCESSFULL BODY MOVEMENT")
                     return
@@ -293,6 +333,22 @@ class App:
         time.sleep(2)
         self.motorControlLayer()
     
+    def __setRealTimeScheduling(self, cpuCore):
+        """Run calling thread with real-time FIFO scheduling policy and pin it to dedicated CPU core. If this is not permitted (or not supported), thread
+        keeps running with default scheduling.
+
+        Args:
+            cpuCore (int): CPU core to pin the thread to. Each real-time thread should get its own core, so that they do not block each other.
+        """
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(config.CONTROL_THREAD_PRIORITY))
+        except (AttributeError, OSError) as e:
+            print(f"Cannot set real-time scheduling policy, because {e}.")
+        try:
+            os.sched_setaffinity(0, {cpuCore})
+        except (AttributeError, OSError) as e:
+            print(f"Cannot pin thread to CPU core {cpuCore}, because {e}.")
+
     def __distributeForces(self, legsIds, duration):
         """Run force distribution process in a loop for a given duration.
         """
@@ -327,7 +383,7 @@ class App:
 
         with self.statesObjectsLocker:
             qALeg = self.qA[leg]
-        lastJointPositionInLocal = kin.legBaseToThirdJointForwardKinematics(qALeg)[:,3][:3]
+        lastJointPositionInLocal = kin.legBaseToThirdJointForwardKinematics(qALeg)[:3, 3]
         lastJointToGoalPinInSpiderUnit = tf.getLastJointToGoalPinVectorInSpider(leg, lastJointPositionInLocal, goalPinPosition, pose)
 
         self.motorsVelocityController.startForceMode([leg], [lastJointToGoalPinInSpiderUnit * 2.5])
@@ -347,7 +403,7 @@ class App:
         # Read spider's rpy after releasing the leg.
         rpy = self.pumpsBnoArduino.getRpy()
         pinToPinLocal, legOriginOrientationInGlobal = tf.getPinToPinVectorInLocal(leg, rpy, currentPinPosition, goalPinPosition)
-        globalZDirectionInLegOrigin = np.dot(legOriginOrientationInGlobal, np.array([0.0, 0.0, 1.0], dtype = np.float32))
+        globalZDirectionInLegOrigin = np.matmul(legOriginOrientationInGlobal, np.array([0.0, 0.0, 1.0], dtype = np.float32))
         with self.statesObjectsLocker:
             xALegBeforeMovement = self.xA[leg]
 
@@ -357,7 +413,7 @@ class App:
         
         # Move leg and update spider state.
         localGoalPosition = self.motorsVelocityController.moveLegAsync(leg, xALegBeforeMovement, pinToPinLocal, config.LEG_ORIGIN, 3, config.BEZIER_TRAJECTORY, isOffset = True)
-        updateDictThread = self.threadManager.run(self.jsonFileManager.updatePins, config.UPDATE_DICT_THREAD_NAME, True, True, False, False, (leg, goalPinPosition, ))
+        updateDictThread = self.threadManager.run(self.jsonFileManager.updatePins, config.UPDATE_DICT_THREAD_NAME, True, True, False, False, (leg, goalPinPosition, ), niceValue = config.NON_CRITICAL_THREADS_NICE_VALUE)
         if self.safetyKillEvent.wait(timeout = 4.0):
             return False
         updateDictThread.join()
@@ -550,8 +606,8 @@ class App:
         if wateringLegId not in self.motorsVelocityController.grippersArduino.getIdsOfAttachedLegs():
             rpy = self.pumpsBnoArduino.getRpy()
             spiderRotationInGlobal = tf.xyzRpyToMatrix(rpy, True)
-            legOriginOrientationInGlobal = np.linalg.inv(np.dot(spiderRotationInGlobal, spider.T_ANCHORS[wateringLegId][:3, :3]))
-            globalZDirectionInLegOrigin = np.dot(legOriginOrientationInGlobal, np.array([0.0, 0.0, 1.0], dtype = np.float32))
+            anchorOrientationInGlobal = np.matmul(spiderRotationInGlobal, spider.T_ANCHORS[wateringLegId][:3, :3])
+            globalZDirectionInLegOrigin = np.linalg.solve(anchorOrientationInGlobal, np.array([0.0, 0.0, 1.0], dtype = np.float32))
 
             return self.__correction(wateringLegId, globalZDirectionInLegOrigin, xALegBeforeWatering)
         
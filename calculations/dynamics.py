@@ -233,19 +233,17 @@ def _createJmMatrix(xA):
         numpy.ndarray: 3x(3xn) Jm matrix, where n is number of used legs.
     """
     xA = np.array(xA, dtype = np.float32)
-    for i in range(len(xA)):
-        x, y, z = xA[i]
-        antisimMatrix = np.array([
-            [0, -z, y],
-            [z, 0, -x],
-            [-y, x, 0]
-        ], dtype = np.float32)
-        if i == 0:
-            Jm = antisimMatrix
-            continue
-        Jm = np.c_[Jm, antisimMatrix]
-
-    return Jm
+    x, y, z = xA.T
+    # Antisimetric matrices of all legs are written into preallocated array (row, leg, column), which is then reshaped into 3x(3xn) matrix.
+    Jm = np.zeros((3, len(xA), 3), dtype = np.float32)
+    Jm[0, :, 1] = -z
+    Jm[0, :, 2] = y
+    Jm[1, :, 0] = z
+    Jm[1, :, 2] = -x
+    Jm[2, :, 0] = -y
+    Jm[2, :, 1] = x
+
+    return Jm.reshape(3, 3 * len(xA))
 
 def _createJfMatrix():
     for i in range(spider.NUMBER_OF_LEGS):
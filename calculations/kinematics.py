@@ -31,9 +31,9 @@ def allLegsPositions(jointsValues, fkType, legs = spider.LEGS_IDS):
     xA = np.zeros((len(legs), 3), dtype = np.float32)
     for leg in legs:
         if fkType == LEG_ORIGIN:
-            xA[leg] = legForwardKinematics(jointsValues[leg])[:,3][:3]
+            xA[leg] = legForwardKinematics(jointsValues[leg])[:3, 3]
             continue
-        xA[leg] = spiderBaseToLegTipForwardKinematics(leg, jointsValues[leg])[:,3][:3]
+        xA[leg] = spiderBaseToLegTipForwardKinematics(leg, jointsValues[leg])[:3, 3]
     
     return xA
 
@@ -127,9 +127,9 @@ def platformForwardKinematics(legsIds, legsGlobalPositions, legsSpiderPoses):
     p1, p2, _ = legsGlobalPositions
 
     # Compute coordinate system of a wall-plane (in spider's origin)
-    l12 = l2[:,3][:3] - l1[:,3][:3]
-    l13 = l3[:,3][:3] - l1[:,3][:3]
-    l23 = l3[:,3][:3] - l2[:,3][:3]
+    l12 = l2[:3, 3] - l1[:3, 3]
+    l13 = l3[:3, 3] - l1[:3, 3]
+    l23 = l3[:3, 3] - l2[:3, 3]
     n = [
         np.cross(l12, l13) if np.cross(l12, l13)[2] >= 0.0 else np.cross(l13, l12),
         np.cross(l12, l23) if np.cross(l12, l23)[2] >= 0.0 else np.cross(l23, l12),
@@ -150,21 +150,21 @@ def platformForwardKinematics(legsIds, legsGlobalPositions, legsSpiderPoses):
         [math.sin(phi), math.cos(phi), 0],
         [0, 0, 1]
     ])
-    Pglobal = np.dot(np.linalg.inv(rot), P)
+    Pglobal = np.linalg.solve(rot, P)
     Pglobal = np.c_[Pglobal, np.zeros(3)]
     Pglobal = np.r_[Pglobal, [[0, 0, 0, 1]]]
 
     positions = np.zeros([len(legsSpiderPoses), 3])
     for idx, leg in enumerate(legsSpiderPoses):
-        positions[idx] = legsGlobalPositions[idx] + np.dot(Pglobal[:3, :3], -leg[:, 3][:3])
-    Pglobal[:,3][:3] = np.mean(positions, axis = 0)
+        positions[idx] = legsGlobalPositions[idx] + np.matmul(Pglobal[:3, :3], -leg[:3, 3])
+    Pglobal[:3, 3] = np.mean(positions, axis = 0)
 
     yaw = math.atan2(Pglobal[1, 0], Pglobal[0, 0])
     # Note that roll and pitch are swapped because of spider's axis definition.
     roll = math.atan2(-Pglobal[2, 0], math.sqrt(math.pow(Pglobal[2, 1], 2) + math.pow(Pglobal[2, 2], 2)))
     pitch = math.atan2(Pglobal[2, 1], Pglobal[2, 2])
 
-    x, y, z = Pglobal[:,3][:3]
+    x, y, z = Pglobal[:3, 3]
     xyzrpy = [x, y, z, roll, pitch, yaw]
     
     return xyzrpy
@@ -183,16 +183,15 @@ def getSpiderPose(legsIds, legsGlobalPositions, qA):
     legsGlobalPositions = np.array(legsGlobalPositions)
     poses = []
     legsIds = list(legsIds)
-    for legsSubset in itt.combinations(legsIds, 3):
-        legsSubset = np.array(legsSubset)
-        subsetIdxs = [legsIds.index(leg) for leg in legsSubset]
+    # Each leg appears in several combinations, so calculate its forward kinematics only once.
+    legsSpiderPoses = np.array([spiderBaseToLegTipForwardKinematics(leg, qA[leg]) for leg in legsIds], dtype = np.float64)
+    for subsetIdxs in itt.combinations(range(len(legsIds)), 3):
+        subsetIdxs = list(subsetIdxs)
+        legsSubset = np.array(legsIds)[subsetIdxs]
         # Skip calculations if all three selected legs are on the same line.
         if not (np.diff(legsGlobalPositions[subsetIdxs][:, 0]).any() and np.diff(legsGlobalPositions[subsetIdxs][:, 1]).any()):
             continue
-        jointsValues = qA[legsSubset]
-        legsPoses = np.zeros([3, 4, 4])
-        for idx, leg in enumerate(legsSubset):
-            legsPoses[idx] = spiderBaseToLegTipForwardKinematics(leg, jointsValues[idx])
+        legsPoses = legsSpiderPoses[subsetIdxs]
         poses.append(platformForwardKinematics(legsSubset, legsGlobalPositions[(subsetIdxs)], legsPoses))
     pose = np.mean(np.array(poses), axis = 0)
 
@@ -215,8 +214,8 @@ def getGoalPinInLocal(legId, attachedLegs, legsGlobalPositions, qA, rpy):
     pose = tf.xyzRpyToMatrix(pose)
     rotation = tf.xyzRpyToMatrix(rpy, True)
     pose[:3, :3] = rotation
-    goalPinInSpider = np.dot(np.linalg.inv(pose), np.append(legsGlobalPositions[legId], 1))
-    goalPinInLocal = np.dot(np.linalg.inv(spider.T_ANCHORS[legId]), goalPinInSpider)[:3]
+    goalPinInSpider = np.linalg.solve(pose, np.append(legsGlobalPositions[legId], 1))
+    goalPinInLocal = np.linalg.solve(spider.T_ANCHORS[legId], goalPinInSpider)[:3]
 
     return goalPinInLocal
 #endregion
@@ -343,9 +342,9 @@ def getXdXddFromOffsets(forceModeLegs, offsetsInSpiderOrigin, velocitiesInSpider
 
     for i, leg in enumerate(forceModeLegs):
         # Rotate offset and velocity vector in spider's origin into leg-local origin.
-        spiderToLegRotation = np.linalg.inv(spiderToLegTransforms[leg][:3, :3])
-        offsetsInLegsOrigins[i] = np.dot(spiderToLegRotation, offsetsInSpiderOrigin[leg])
-        velocitiesInLegsOrigins[i] = np.dot(spiderToLegRotation, velocitiesInSpiderOrigin[leg])
+        offsetAndVelocityInLegOrigin = np.linalg.solve(spiderToLegTransforms[leg][:3, :3], np.c_[offsetsInSpiderOrigin[leg], velocitiesInSpiderOrigin[leg]])
+        offsetsInLegsOrigins[i] = offsetAndVelocityInLegOrigin[:, 0]
+        velocitiesInLegsOrigins[i] = offsetAndVelocityInLegOrigin[:, 1]
 
     return offsetsInLegsOrigins, velocitiesInLegsOrigins
 #endregion
\ No newline at end of file
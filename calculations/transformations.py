@@ -45,16 +45,52 @@ def xyzRpyToMatrix(xyzrpy, rotationOnly = False):
         [math.sin(yawAngle), math.cos(yawAngle), 0],
         [0, 0, 1]
     ], dtype = np.float32)
-    rotationMatrix = np.dot(roll, np.dot(pitch, yaw))
+    rotationMatrix = np.matmul(roll, np.matmul(pitch, yaw))
 
     if not rotationOnly:
-        transformMatrix = np.c_[rotationMatrix, position]
-        transformMatrix = np.r_[transformMatrix, [np.array([0, 0, 0, 1], dtype = np.float32)]]
+        position = np.asarray(position)
+        transformMatrix = np.eye(4, dtype = np.result_type(rotationMatrix, position))
+        transformMatrix[:3,:3] = rotationMatrix
+        transformMatrix[:3,3] = position
         
         return transformMatrix
     
     return rotationMatrix
 
+def xyzRpyToMatrices(poses):
+    """Calculate global transformation matrices for multiple spider's poses at once.
+
+    Args:
+        poses (list): nx4 or nx6 array of global spider's poses, representing xyzy or xyzrpy values.
+
+    Returns:
+        numpy.ndarray: nx4x4 array of transformation matrices from global origin to spider, equal to those calculated with xyzRpyToMatrix.
+    """
+    poses = np.asarray(poses)
+    if poses.shape[1] == 4:
+        angles = np.zeros((len(poses), 3), dtype = poses.dtype)
+        angles[:, 2] = poses[:, 3]
+    else:
+        angles = poses[:, 3:]
+    cosines = np.cos(angles, dtype = np.float64).astype(np.float32)
+    sines = np.sin(angles, dtype = np.float64).astype(np.float32)
+    cr, cp, cy = cosines.T
+    sr, sp, sy = sines.T
+
+    roll = np.zeros((len(poses), 3, 3), dtype = np.float32)
+    roll[:, 0, 0], roll[:, 0, 2], roll[:, 1, 1], roll[:, 2, 0], roll[:, 2, 2] = cr, sr, 1, -sr, cr
+    pitch = np.zeros((len(poses), 3, 3), dtype = np.float32)
+    pitch[:, 0, 0], pitch[:, 1, 1], pitch[:, 1, 2], pitch[:, 2, 1], pitch[:, 2, 2] = 1, cp, -sp, sp, cp
+    yaw = np.zeros((len(poses), 3, 3), dtype = np.float32)
+    yaw[:, 0, 0], yaw[:, 0, 1], yaw[:, 1, 0], yaw[:, 1, 1], yaw[:, 2, 2] = cy, -sy, sy, cy, 1
+
+    transformMatrices = np.zeros((len(poses), 4, 4), dtype = np.result_type(np.float32, poses))
+    transformMatrices[:, :3, :3] = np.matmul(roll, np.matmul(pitch, yaw))
+    transformMatrices[:, :3, 3] = poses[:, :3]
+    transformMatrices[:, 3, 3] = 1
+
+    return transformMatrices
+
 def getPinToPinVectorInLocal(legId, rpy, currentPinPosition, goalPinPosition):
     """Calculate pin-to-pin vector in leg's local origin.
 
@@ -68,33 +104,36 @@ def getPinToPinVectorInLocal(legId, rpy, currentPinPosition, goalPinPosition):
         tuple: 1x3 pin-to-pin vector in leg's local origin and 3x3 orientation matrix of leg's anchor in global origin.
     """
     spiderRotationInGlobal = xyzRpyToMatrix(rpy, True)
-    legOriginOrientationInGlobal = np.linalg.inv(np.dot(spiderRotationInGlobal, spider.T_ANCHORS[legId][:3, :3]))
+    legOriginOrientationInGlobal = np.linalg.inv(np.matmul(spiderRotationInGlobal, spider.T_ANCHORS[legId][:3, :3]))
     pinToPinGlobal = goalPinPosition - currentPinPosition
-    pinToPinLocal = np.dot(legOriginOrientationInGlobal, pinToPinGlobal)
+    pinToPinLocal = np.matmul(legOriginOrientationInGlobal, pinToPinGlobal)
 
     return pinToPinLocal, legOriginOrientationInGlobal
 
-def getLegInLocal(legId, globalLegPosition, spiderPose):
+def getLegInLocal(legId, globalLegPosition, spiderPose, T_GS = None):
     """Calculate local leg's position from given global position.
 
     Args:
         legId (int): Leg id.
         globalLegPosition (list): Global position of leg.
         spiderPose (list): Global spider's pose. Could be given as 1x4 array, representing xyzy values or 1x6 array, representing xyzrpy values.
+        T_GS (numpy.ndarray, optional): Precalculated 4x4 transformation matrix of given spider's pose. Defaults to None.
 
     Returns:
         numpy.ndarray: 1x3 array of with x, y and z leg's positions in leg-local origin.
     """
-    T_GS = xyzRpyToMatrix(spiderPose)
-    T_GA = np.dot(T_GS, spider.T_ANCHORS[legId])
+    if T_GS is None:
+        T_GS = xyzRpyToMatrix(spiderPose)
+    T_GA = np.matmul(T_GS, spider.T_ANCHORS[legId])
     globalLegPosition = np.append(globalLegPosition, 1)
 
-    return np.dot(np.linalg.inv(T_GA), globalLegPosition)[:3]
+    return np.linalg.solve(T_GA, globalLegPosition)[:3]
 
-def getGlobalDirectionInLocal(legId, spiderPose, globalDirection):
-    T_GS = xyzRpyToMatrix(spiderPose)
-    T_GA = np.dot(T_GS, spider.T_ANCHORS[legId])[:3,:3]
-    localDirection = np.dot(np.linalg.inv(T_GA), globalDirection)
+def getGlobalDirectionInLocal(legId, spiderPose, globalDirection, T_GS = None):
+    if T_GS is None:
+        T_GS = xyzRpyToMatrix(spiderPose)
+    T_GA = np.matmul(T_GS, spider.T_ANCHORS[legId])[:3,:3]
+    localDirection = np.linalg.solve(T_GA, globalDirection)
 
     return localDirection
 
@@ -105,23 +144,28 @@ def getLegsInGlobal(legsIds, localLegsPositions, spiderPose, origin):
         legsIds (list): Legs ids.
         localLegsPositions (list): nx3 array of legs positions in their local origins, where n should be same as length of legsIds list.
         spiderPose (list): Global spider's pose. Could be given as 1x4 array, representing xyzy values or 1x6 array, representing xyzrpy values.
+        origin (str): Origin that local positions are given in, either leg-local or spider's origin.
+
+    Raises:
+        ValueError: If origin is unknown.
 
     Returns:
         numpy.ndarray: nx3 array of legs positions in global origin, where n is number of given legs.
     """ 
-    legsGlobalPositions = np.empty([len(legsIds), 3], dtype = np.float32)
     T_GS = xyzRpyToMatrix(spiderPose)
-    for idx, leg in enumerate(legsIds):
-        if origin == config.LEG_ORIGIN:
-            anchorInGlobal = np.dot(T_GS, spider.T_ANCHORS[leg])
-            legInGlobal = np.dot(anchorInGlobal, np.append(localLegsPositions[idx], 1))
-        elif origin == config.SPIDER_ORIGIN:
-            legInGlobal = np.dot(T_GS, np.append(localLegsPositions[idx], 1))
-        legsGlobalPositions[idx] = legInGlobal[:3]
+    localLegsPositions = np.c_[np.array(localLegsPositions), np.ones(len(legsIds))]
+    if origin == config.LEG_ORIGIN:
+        # Stack of nx4x4 transformations from global origin to legs' anchors.
+        T_GA = np.matmul(T_GS, spider.T_ANCHORS[np.array(legsIds)])
+        legsGlobalPositions = np.matmul(T_GA, localLegsPositions[:, :, np.newaxis])[:, :3, 0]
+    elif origin == config.SPIDER_ORIGIN:
+        legsGlobalPositions = np.matmul(localLegsPositions, T_GS.T)[:, :3]
+    else:
+        raise ValueError(f"Unknown origin {origin}.")
 
-    return legsGlobalPositions
+    return legsGlobalPositions.astype(np.float32)
 
-def convertIntoLocalGoalPosition(legId, legCurrentPosition, goalPositionOrOffset, origin, isOffset, spiderPose):
+def convertIntoLocalGoalPosition(legId, legCurrentPosition, goalPositionOrOffset, origin, isOffset, spiderPose, T_GS = None):
     """Transform given leg's goal position into local origin.
 
     Args:
@@ -131,6 +175,7 @@ def convertIntoLocalGoalPosition(legId, legCurrentPosition, goalPositionOrOffset
         origin (str): Origin that goal position or offset is given in.
         isOffset (bool): If True, goal position is given as an offset, otherwise as an absolute position.
         spiderPose (list): Spider's pose given in global origin.
+        T_GS (numpy.ndarray, optional): Precalculated 4x4 transformation matrix of given spider's pose. Defaults to None.
 
     Returns:
         numpy.ndarray: 1x3 array of leg's goal position, given in local origin.
@@ -141,8 +186,8 @@ def convertIntoLocalGoalPosition(legId, legCurrentPosition, goalPositionOrOffset
             localGoalPosition += legCurrentPosition
         return localGoalPosition
     if not isOffset:
-        return getLegInLocal(legId, goalPositionOrOffset, spiderPose)
-    return np.array(legCurrentPosition + getGlobalDirectionInLocal(legId, spiderPose, goalPositionOrOffset), dtype = np.float32)
+        return getLegInLocal(legId, goalPositionOrOffset, spiderPose, T_GS)
+    return np.array(legCurrentPosition + getGlobalDirectionInLocal(legId, spiderPose, goalPositionOrOffset, T_GS), dtype = np.float32)
 
 def getWateringLegAndPose(spiderStartPose, plantPosition = None, doRefill = False):
     """Calculate spider's pose for watering the plant or refilling water tank and leg used for the task.
@@ -202,7 +247,7 @@ def getLastJointToGoalPinVectorInSpider(legId, lastJointPositionInLocal, goalPin
     """
     goalPinPositionInLocal = getLegInLocal(legId, goalPinPositionInGlobal, spiderPose)
     lastJointToGoalPinInLocal = np.array(goalPinPositionInLocal - lastJointPositionInLocal)
-    lastJointToGoalPinInSpider = np.dot(spider.T_ANCHORS[legId][:3, :3], lastJointToGoalPinInLocal)
+    lastJointToGoalPinInSpider = np.matmul(spider.T_ANCHORS[legId][:3, :3], lastJointToGoalPinInLocal)
 
     return lastJointToGoalPinInSpider / np.linalg.norm(lastJointToGoalPinInSpider) 
 
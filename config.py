@@ -28,8 +28,13 @@ TRANSITION_THREAD_NAME = 'transition_thread'
 RESTING_THREAD_NAME = 'resting_thread'
 SAFETY_THREAD_NAME = 'safety_thread'
 CONTROL_THREAD_NAME = 'control_thread'
+MOTORS_COMMUNICATION_THREAD_NAME = 'motors_communication_thread'
 UPDATE_DICT_THREAD_NAME = 'update_dict_thread'
 UPDATE_DATA_THREAD_NAME = 'update_data_thread'
+CONTROL_THREAD_PRIORITY = 80
+CONTROL_THREAD_CPU_CORE = 3
+MOTORS_COMMUNICATION_THREAD_CPU_CORE = 2
+NON_CRITICAL_THREADS_NICE_VALUE = 10
 STATE_DICT_POSE_KEY = 'pose'
 STATE_DICT_PINS_KEY = 'pins'
 
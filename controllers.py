@@ -2,6 +2,7 @@ import numpy as np
 import time
 import threading
 import queue
+import collections
 
 import config
 from environment import spider
@@ -13,6 +14,43 @@ from planning import trajectoryplanner as trajPlanner
 from periphery import grippers
 
 
+class LegQueue:
+    """Queue of reference values for a single leg. Unlike queue.Queue, it can be reset and filled with whole trajectory in place, under its own lock.
+    """
+    def __init__(self):
+        self.items = collections.deque()
+        self.locker = threading.Lock()
+
+    def get(self):
+        """Remove and return first item from the queue.
+
+        Raises:
+            queue.Empty: If queue is empty.
+
+        Returns:
+            Any: First item in the queue.
+        """
+        with self.locker:
+            if not self.items:
+                raise queue.Empty
+            return self.items.popleft()
+
+    def extend(self, items):
+        """Append all given items to the end of the queue at once.
+
+        Args:
+            items (iterable): Items to append.
+        """
+        with self.locker:
+            self.items.extend(items)
+
+    def reset(self):
+        """Remove all items from the queue.
+        """
+        with self.locker:
+            self.items.clear()
+
+
 class VelocityController:
     """ Class for velocity-control of spider's movement. All legs are controlled with same controller, but can be moved separately and independently
     from other legs. Reference positions for each legs are writen in legs-queues. On each control-loop controller takes first values from all of the legs-queues.
@@ -20,7 +58,7 @@ class VelocityController:
     def __init__ (self):
         self.grippersArduino = grippers.GrippersArduino()
 
-        self.legsQueues = [queue.Queue() for _ in range(spider.NUMBER_OF_LEGS)]
+        self.legsQueues = [LegQueue() for _ in range(spider.NUMBER_OF_LEGS)]
         self.sentinel = object()
 
         self.lastLegsPositions = np.zeros((spider.NUMBER_OF_LEGS, 3), dtype = np.float32)
@@ -31,6 +69,11 @@ class VelocityController:
         self.period = 1.0 / config.CONTROLLER_FREQUENCY
         self.Kp = np.ones((spider.NUMBER_OF_LEGS, 3), dtype = np.float32) * config.K_P
         self.Kd = np.ones((spider.NUMBER_OF_LEGS, 3), dtype = np.float32) * config.K_D
+        self.Kacc = config.K_ACC
+        self.KpForce = config.K_P_FORCE
+        # Gains with controller's period already included, to avoid division and multiplication with period on each control loop.
+        self.KdOverPeriod = self.Kd * config.CONTROLLER_FREQUENCY
+        self.KpForceTimesPeriod = np.float32(config.K_P_FORCE / config.CONTROLLER_FREQUENCY)
 
         self.isForceMode = False
         self.forceModeLegsIds = None
@@ -85,8 +128,7 @@ class VelocityController:
         qCd = kin.getJointsVelocities(qA, xCd)
 
         if isForceMode:
-            qCd[qCd > 1.0] = 1.0
-            qCd[qCd < -1.0] = -1.0
+            np.clip(qCd, -1.0, 1.0, out = qCd)
 
         return qCd
     
@@ -107,21 +149,19 @@ class VelocityController:
             TypeError: If origin is global and spiderPose is None.
 
         Returns:
-            bool: False if ValueError is catched during trajectory calculation, True otherwise.
+            numpy.ndarray: 1x3 goal position in leg's local origin.
         """
         if origin not in (config.LEG_ORIGIN, config.GLOBAL_ORIGIN):
             raise ValueError("Unknown origin.")
         if origin == config.GLOBAL_ORIGIN and spiderPose is None:
             raise TypeError("Parameter spiderPose should not be None.")
 
-        self.legsQueues[legId] = queue.Queue()
+        self.__clearLegQueue(legId)
 
         localGoalPosition = tf.convertIntoLocalGoalPosition(legId, legCurrentPosition, goalPositionOrOffset, origin, isOffset, spiderPose)
         positionTrajectory, velocityTrajectory, accelerationTrajectory = trajPlanner.getTrajectory(legCurrentPosition, localGoalPosition, duration, trajectoryType)
 
-        for idx, position in enumerate(positionTrajectory):
-            self.legsQueues[legId].put([position[:3], velocityTrajectory[idx][:3], accelerationTrajectory[idx][:3]])
-        self.legsQueues[legId].put(self.sentinel)
+        self.__fillLegQueue(legId, positionTrajectory[:, :3], velocityTrajectory[:, :3], accelerationTrajectory[:, :3])
 
         return localGoalPosition
             
@@ -156,33 +196,26 @@ class VelocityController:
         
         # Stop all of the given legs.
         for leg in legsIds:
-            self.legsQueues[leg] = queue.Queue()
-
-        xDs = np.zeros((len(legsIds), int(duration / self.period), 3), dtype = np.float32)
-        xDds = np.zeros((len(legsIds), int(duration / self.period), 3), dtype = np.float32)
-        xDdds = np.zeros((len(legsIds), int(duration / self.period), 3) , dtype = np.float32)
-
-        for idx, leg in enumerate(legsIds):          
-            localGoalPosition = tf.convertIntoLocalGoalPosition(leg, legsCurrentPositions[leg], goalPositionsOrOffsets[idx], origin, isOffset, spiderPose) 
-            positionTrajectory, velocityTrajectory, accelerationTrajectory = trajPlanner.getTrajectory(legsCurrentPositions[leg], localGoalPosition, duration, trajectoryType)
-
-            xDs[idx] = positionTrajectory[:, :3]
-            xDds[idx] = velocityTrajectory[:, :3]
-            xDdds[idx] = accelerationTrajectory[:, :3]
+            self.__clearLegQueue(leg)
+
+        startPositions = np.array([legsCurrentPositions[leg] for leg in legsIds], dtype = np.float32)
+        # Spider's pose is the same for all legs, so its transformation matrix is calculated only once.
+        T_GS = tf.xyzRpyToMatrix(spiderPose) if origin == config.GLOBAL_ORIGIN else None
+        localGoalPositions = np.array([
+            tf.convertIntoLocalGoalPosition(leg, legsCurrentPositions[leg], goalPositionsOrOffsets[idx], origin, isOffset, spiderPose, T_GS)
+            for idx, leg in enumerate(legsIds)], dtype = np.float32)
+        xDs, xDds, xDdds = trajPlanner.getTrajectories(startPositions, localGoalPositions, duration, trajectoryType)
         
-        for i in range(len(xDs[0])):
-            for idx, leg in enumerate(legsIds):
-                self.legsQueues[leg].put([xDs[idx][i], xDds[idx][i], xDdds[idx][i]])
-
-        for leg in legsIds:
-            self.legsQueues[leg].put(self.sentinel)
+        for idx, leg in enumerate(legsIds):
+            self.__fillLegQueue(leg, xDs[idx], xDds[idx], xDdds[idx])
         
         return True
 
     def clearInstructionQueues(self):
         """Clear instruction queues for all legs.
         """
-        self.legsQueues = [queue.Queue() for _ in range(spider.NUMBER_OF_LEGS)]
+        for leg in spider.LEGS_IDS_TUPLE:
+            self.__clearLegQueue(leg)
     
     def updateLastLegsPositions(self, xA):
         """Update last legs positions.
@@ -222,7 +255,7 @@ class VelocityController:
         """
         with self.locker:
             self.isImpedanceMode = True
-            self.impedanceDirection = velocityDirection
+            self.impedanceDirection = np.array(velocityDirection, dtype = np.float32)
             self.impedanceLegId = legId
     
     def stopImpedanceMode(self):
@@ -232,6 +265,26 @@ class VelocityController:
     #endregion
 
     #region private methods
+    def __clearLegQueue(self, legId):
+        """Remove all reference values from leg-queue. Queue is emptied in place, so controller loop always reads from the same queue object.
+
+        Args:
+            legId (int): Leg id.
+        """
+        self.legsQueues[legId].reset()
+
+    def __fillLegQueue(self, legId, positions, velocities, accelerations):
+        """Write whole trajectory with ending sentinel into leg-queue at once, under queue's lock. Controller loop therefore never reads partially written
+        trajectory and rows are not put into queue one by one.
+
+        Args:
+            legId (int): Leg id.
+            positions (numpy.ndarray): nx3 array of reference positions.
+            velocities (numpy.ndarray): nx3 array of reference velocities.
+            accelerations (numpy.ndarray): nx3 array of reference accelerations.
+        """
+        self.legsQueues[legId].extend([*zip(positions, velocities, accelerations), self.sentinel])
+
     def __getXdXddXdddFromQueues(self):
         """Read current desired position, velocity and acceleration from queues for each leg. If leg-queue is empty, keep leg on latest position.
 
@@ -242,9 +295,9 @@ class VelocityController:
         xDd = np.zeros((spider.NUMBER_OF_LEGS, 3), dtype = np.float32)
         xDdd = np.zeros((spider.NUMBER_OF_LEGS, 3), dtype = np.float32)
 
-        for leg in spider.LEGS_IDS:
+        for leg in spider.LEGS_IDS_TUPLE:
             try:
-                queueData = self.legsQueues[leg].get(False)
+                queueData = self.legsQueues[leg].get()
                 if queueData is not self.sentinel:
                     with self.locker:
                         self.lastLegsPositions[leg] = queueData[0]
@@ -278,9 +331,8 @@ class VelocityController:
         Returns:
             tuple: Two 5x3 arrays of commanded legs velocities and current position errors.
         """
-        xErrors = np.array(xD - xA)
-        dXe = (xErrors - self.lastXErrors) / self.period
-        xCd = np.array(self.Kp * xErrors + self.Kd * dXe + xDd + config.K_ACC * xDdd, dtype = np.float32)
+        xErrors = (xD - xA).astype(np.float32, copy = False)
+        xCd = (self.Kp * xErrors + self.KdOverPeriod * (xErrors - self.lastXErrors) + xDd + self.Kacc * xDdd).astype(np.float32, copy = False)
 
         return xCd, xErrors
 
@@ -294,9 +346,9 @@ class VelocityController:
         Returns:
             tuple: Two 5x3 array of of position offsets of leg-tips and leg-tips velocities, given in spider's origin.
         """
-        fErrors = desiredForces - currentForces
-        dXSpider = fErrors * config.K_P_FORCE
-        offsets = dXSpider * self.period
+        fErrors = (desiredForces - currentForces).astype(np.float32, copy = False)
+        dXSpider = fErrors * self.KpForce
+        offsets = fErrors * self.KpForceTimesPeriod
 
         return offsets, dXSpider
     #endregion
\ No newline at end of file
@@ -55,4 +55,4 @@ class CommunicationWithServer:
           
                 if killEvent.wait(timeout = 5): 
                     break
-        self.updatingDataThread, self.updatingDataThreadKillEvent = self.threadManager.run(updatingSensorPositionData, config.UPDATE_DATA_THREAD_NAME, False, True)
+        self.updatingDataThread, self.updatingDataThreadKillEvent = self.threadManager.run(updatingSensorPositionData, config.UPDATE_DATA_THREAD_NAME, False, True, niceValue = config.NON_CRITICAL_THREADS_NICE_VALUE)
@@ -13,13 +13,10 @@ def _getLegAnchorsInSpiderOrigin():
     # Angles between anchors and spiders x axis.
     legAngles = _getLegAnglesXAxis()
     # Positions of leg anchors on spiders platform in spiders origin.
-    legAnchors = [[BODY_RADIUS * math.cos(angle), BODY_RADIUS * math.sin(angle)] for angle in legAngles]
+    legAnchors = BODY_RADIUS * np.column_stack((np.cos(legAngles), np.sin(legAngles)))
 
     # Reverse to match actual spiders legs order.
-    legAnchorsReversed = np.flip(legAnchors[1:], 0)
-    legAnchorsReversed = np.insert(legAnchorsReversed, 0, legAnchors[0], 0)
-
-    return np.array(legAnchorsReversed)
+    return np.vstack((legAnchors[:1], legAnchors[:0:-1]))
 
 def _getIdealLegVectors():
     """Calculate directions of ideal leg vectors in spider's origin. Ideal leg vector has a radial direction, looking from center of a spider's body.
@@ -29,14 +26,10 @@ def _getIdealLegVectors():
     """
     legAngles = _getLegAnglesXAxis()
 
-    idealLegVectors = [np.array([legAnchor[0] + math.cos(legAngles[idx]), legAnchor[1] + math.sin(legAngles[idx])]) - legAnchor
-        for idx, legAnchor in enumerate(LEG_ANCHORS)]
+    idealLegVectors = np.column_stack((np.cos(legAngles), np.sin(legAngles)))
 
     # Reverse to match actual spiders legs order.
-    idealLegVectorsReversed = np.flip(idealLegVectors[1:], 0)
-    idealLegVectorsReversed = np.insert(idealLegVectorsReversed, 0, idealLegVectors[0], 0)
-
-    return np.array(idealLegVectorsReversed)
+    return np.vstack((idealLegVectors[:1], idealLegVectors[:0:-1]))
 
 def _getLegAnglesXAxis():
     """Calculate angles between vectors between anchor and spider's origin and spider's x axis.
@@ -44,8 +37,7 @@ def _getLegAnglesXAxis():
     Returns:
         numpy.ndarray: 1x5 array of angles in radians.
     """
-    legAngles = [np.radians(90) - leg * ANGLE_BETWEEN_LEGS for leg in range(NUMBER_OF_LEGS)]
-    return np.array(legAngles)
+    return np.radians(90) - np.arange(NUMBER_OF_LEGS) * ANGLE_BETWEEN_LEGS
 
 def _getTransformMatricesToAnchors():
     """Calculate transformation matrices for transformation from spider's base to anchor.
@@ -55,18 +47,18 @@ def _getTransformMatricesToAnchors():
     """
     # Constant rotation offset, because anchors x axis is pointed in radial direction.
     constantRotation = math.pi / 2
-
-    T = []
-    for i in range(NUMBER_OF_LEGS):
-        rotationAngle = i * ANGLE_BETWEEN_LEGS + constantRotation
-        T.append(np.array([
-            [math.cos(rotationAngle), -math.sin(rotationAngle), 0.0, LEG_ANCHORS[i][0]],
-            [math.sin(rotationAngle), math.cos(rotationAngle), 0.0, LEG_ANCHORS[i][1]],
-            [0.0, 0.0, 1.0, 0.0],
-            [0.0, 0.0, 0.0, 1.0]
-        ], dtype = np.float32))
-
-    return np.array(T, dtype = np.float32)
+    rotationAngles = np.arange(NUMBER_OF_LEGS) * ANGLE_BETWEEN_LEGS + constantRotation
+
+    T = np.zeros((NUMBER_OF_LEGS, 4, 4), dtype = np.float32)
+    T[:, 0, 0] = np.cos(rotationAngles)
+    T[:, 0, 1] = -np.sin(rotationAngles)
+    T[:, 1, 0] = np.sin(rotationAngles)
+    T[:, 1, 1] = np.cos(rotationAngles)
+    T[:, :2, 3] = LEG_ANCHORS
+    T[:, 2, 2] = 1.0
+    T[:, 3, 3] = 1.0
+
+    return T
 #endregion
 
 #region constants
@@ -77,6 +69,8 @@ NUMBER_OF_MOTORS_IN_LEG = 3
 # Radius of spiders platform, in meters.
 BODY_RADIUS = 0.15
 LEGS_IDS = np.array([0, 1, 2, 3, 4], dtype = np.int8)
+# Legs ids as a tuple, used for iterating over legs in Python loops (LEGS_IDS is meant for indexing arrays).
+LEGS_IDS_TUPLE = tuple(range(NUMBER_OF_LEGS))
 # Legs ids used for watering the plants.
 WATERING_LEGS_IDS = [1, 4]
 # Leg id used for (re)filling water tank.
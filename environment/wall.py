@@ -32,4 +32,7 @@ def createGrid(threeDim):
 WALL_SIZE = [4.1, 3.1]
 # Pin raster - distances between pins in (x, y).
 WALL_RASTER = [0.2, 0.25]
-PIN_HEIGHT = 0.0
\ No newline at end of file
+PIN_HEIGHT = 0.0
+# Positions of all pins in 3d space, shared between modules. Read-only, since it is computed only once.
+PINS = createGrid(True)
+PINS.flags.writeable = False
@@ -1,4 +1,6 @@
 import json
+import os
+import threading
 import numpy as np
 
 import config
@@ -8,11 +10,14 @@ class JsonFileManager():
     def __init__(self):
         self.FILENAME = 'spider_state_dict'
 
-        self.pins = wall.createGrid(True)
+        self.pins = wall.PINS
+        self.pinsIndexes = {self.__pinKey(pin) : pinIndex for pinIndex, pin in enumerate(self.pins)}
         self.stateDict = {
             'pose' : [],
             'pins' : []
-        }     
+        }
+        self.stateDictLocker = threading.Lock()
+        self.lastWrittenJson = None
 
     def updateWholeDict(self, pose, currentPins, legsOrder):
         """Update pose and pins in dictionary and write it in JSON file.
@@ -25,16 +30,12 @@ class JsonFileManager():
         sortedLegsIndexes = np.argsort(legsOrder)
         sortedPins = currentPins[sortedLegsIndexes]
 
-        pinsIndexes = []
-        for usedPin in sortedPins:
-            for pinIndex, pin in enumerate(self.pins):
-                if pin.tolist() == usedPin.tolist():
-                    pinsIndexes.append(pinIndex)
+        pinsIndexes = [self.pinsIndexes[self.__pinKey(usedPin)] for usedPin in sortedPins if self.__pinKey(usedPin) in self.pinsIndexes]
 
-        self.stateDict['pose'] = pose.tolist()
-        self.stateDict['pins'] = pinsIndexes
-
-        self.__writeJson()
+        with self.stateDictLocker:
+            self.stateDict['pose'] = pose.tolist()
+            self.stateDict['pins'] = pinsIndexes
+            self.__writeJson()
     
     def updatePins(self, legId, pin):
         """Update only one pin position in dictionary and write it in JSON file.
@@ -43,10 +44,9 @@ class JsonFileManager():
             legId (int): Leg id.
             pin (list): 1x3 array of pin position.
         """
-        pinIndex = np.flatnonzero((self.pins == pin).all(1))[0]
-        self.stateDict['pins'][legId] = int(pinIndex)
-
-        self.__writeJson()
+        with self.stateDictLocker:
+            self.stateDict['pins'][legId] = self.pinsIndexes[self.__pinKey(pin)]
+            self.__writeJson()
     
     def readSpiderState(self):
         """Read pose and pins from JSON file and save them into dictionary.
@@ -54,9 +54,11 @@ class JsonFileManager():
         Returns:
             tuple: Spider's pose, used pins indexes and used pins positions.
         """
-        with open(self.FILENAME, 'r', encoding = 'utf-8') as file:
-            self.stateDict = json.load(file)
-        
+        with self.stateDictLocker:
+            with open(self.FILENAME, 'r', encoding = 'utf-8') as file:
+                self.stateDict = json.load(file)
+            self.lastWrittenJson = json.dumps(self.stateDict)
+
         pose = np.array(self.stateDict[config.STATE_DICT_POSE_KEY])
         pinsIndexes = np.array(self.stateDict[config.STATE_DICT_PINS_KEY])
         pinsPositions = self.pins[pinsIndexes]
@@ -64,5 +66,26 @@ class JsonFileManager():
         return pose, pinsIndexes, pinsPositions
 
     def __writeJson(self):
-        with open(self.FILENAME, 'w', encoding = 'utf-8') as file:
-            json.dump(self.stateDict, file)
+        """Write dictionary in JSON file, if it has changed since last write. Dictionary is serialized in one shot and written into temporary file,
+        which then atomically replaces the old one, so readers never see partially written file. Should be called while holding stateDictLocker.
+        """
+        stateJson = json.dumps(self.stateDict)
+        if stateJson == self.lastWrittenJson:
+            return
+
+        temporaryFilename = f'{self.FILENAME}.tmp'
+        with open(temporaryFilename, 'w', encoding = 'utf-8') as file:
+            file.write(stateJson)
+        os.replace(temporaryFilename, self.FILENAME)
+        self.lastWrittenJson = stateJson
+
+    def __pinKey(self, pin):
+        """Create hashable key from pin position, used for looking up pin's index.
+
+        Args:
+            pin (list): 1x3 array of pin position.
+
+        Returns:
+            tuple: Pin position, rounded to 6 decimals.
+        """
+        return tuple(np.round(pin, 6).tolist())
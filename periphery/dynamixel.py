@@ -47,6 +47,9 @@ class MotorDriver:
         self.locker = threading.Lock()
 
         self.motorsIds = np.array(motorsIds, dtype = np.int8)
+        # Motors ids as tuples of Python ints, so that loops do not create and convert numpy scalars on each call into dynamixel_sdk.
+        self.legsMotorsIds = tuple(tuple(legMotorsIds) for legMotorsIds in self.motorsIds.tolist())
+        self.allMotorsIds = tuple(self.motorsIds.flatten().tolist())
         self.portHandler = PortHandler(self.USB_DEVICE_NAME)
         self.packetHandler = PacketHandler(self.PROTOCOL_VERSION)
 
@@ -89,8 +92,8 @@ class MotorDriver:
             hardwareErrors = np.zeros((spider.NUMBER_OF_LEGS, spider.NUMBER_OF_MOTORS_IN_LEG), dtype = np.float32)   
             temperatures = np.zeros((spider.NUMBER_OF_LEGS, spider.NUMBER_OF_MOTORS_IN_LEG), dtype = np.float32)    
                
-            for leg in spider.LEGS_IDS:
-                for idx, motorInLeg in enumerate(self.motorsIds[leg]):
+            for leg in spider.LEGS_IDS_TUPLE:
+                for idx, motorInLeg in enumerate(self.legsMotorsIds[leg]):
                     with self.locker:
                         positions[leg][idx] = self.groupSyncReadPosition.getData(motorInLeg, self.PRESENT_POSITION_ADDR, self.PRESENT_POSITION_DATA_LENGTH)
                         currents[leg][idx] = self.groupSyncReadCurrent.getData(motorInLeg, self.PRESENT_CURRENT_ADDR, self.PRESENT_CURRENT_DATA_LENGTH)
@@ -114,8 +117,8 @@ class MotorDriver:
         Returns:
             bool: True if writing was successfull, False otherwise.
         """
-        for leg in spider.LEGS_IDS:
-            motorsInLeg = self.motorsIds[leg]
+        for leg in spider.LEGS_IDS_TUPLE:
+            motorsInLeg = self.legsMotorsIds[leg]
             encoderVelocities = mappers.mapModelVelocitiesToVelocityEncoderValues(qCd[leg]).astype(int)
             for i, motor in enumerate(motorsInLeg):
                 qCdBytes = [DXL_LOBYTE(DXL_LOWORD(encoderVelocities[i])), DXL_HIBYTE(DXL_LOWORD(encoderVelocities[i])), DXL_LOBYTE(DXL_HIWORD(encoderVelocities[i])), DXL_HIBYTE(DXL_HIWORD(encoderVelocities[i]))]
@@ -135,8 +138,7 @@ class MotorDriver:
     def setBusWatchdog(self, value):
         """Set watchdog on all motors to desired value.
         """
-        motorsArray = self.motorsIds.flatten()
-        for motorId in motorsArray:
+        for motorId in self.allMotorsIds:
             with self.locker:
                 result, error = self.packetHandler.write1ByteTxRx(self.portHandler, motorId, self.BUS_WATCHDOG_ADDR, value)
             comm = self.__commResultAndErrorReader(result, error)
@@ -150,7 +152,7 @@ class MotorDriver:
             legsIds (list, optional): Ids of legs, which are to be disabled, if value is 5 all legs will be disabled. Defaults to 5.
         """
         if legsIds == 5:
-            motorsArray = self.motorsIds.flatten()
+            motorsArray = self.allMotorsIds
         else:
             motorsArray = self.motorsIds[legsIds].flatten()
 
@@ -166,7 +168,7 @@ class MotorDriver:
             legId (list, optional): Ids of legs, which are to be enabled, if value is 5 all legs will be enabled. Defaults to 5.
         """
         if legsIds == 5:
-            motorsArray = self.motorsIds.flatten()
+            motorsArray = self.allMotorsIds
         else:
             motorsArray = self.motorsIds[legsIds]
 
@@ -220,10 +222,10 @@ class MotorDriver:
         if not resultAddParams:
             return False
 
-        for leg in spider.LEGS_IDS:
+        for leg in spider.LEGS_IDS_TUPLE:
             initVelocities = np.zeros(spider.NUMBER_OF_MOTORS_IN_LEG)
             encoderVelocities = mappers.mapModelVelocitiesToVelocityEncoderValues(initVelocities).astype(int)
-            for i, motor in enumerate(self.motorsIds[leg]):
+            for i, motor in enumerate(self.legsMotorsIds[leg]):
                 initVelocityBytes = [DXL_LOBYTE(DXL_LOWORD(encoderVelocities[i])), DXL_HIBYTE(DXL_LOWORD(encoderVelocities[i])), DXL_LOBYTE(DXL_HIWORD(encoderVelocities[i])), DXL_HIBYTE(DXL_HIWORD(encoderVelocities[i]))]
                 resultWrite = self.groupSyncWriteVelocity.addParam(motor, initVelocityBytes)
                 if not resultWrite:
@@ -238,7 +240,7 @@ class MotorDriver:
         Returns:
             bool: True if adding was successfull, False otherwise.
         """
-        for motor in self.motorsIds.flatten():
+        for motor in self.allMotorsIds:
             resultPosition = self.groupSyncReadPosition.addParam(motor)
             resultCurrent = self.groupSyncReadCurrent.addParam(motor)
             resultHardwareError = self.groupSyncReadHardwareError.addParam(motor)
@@ -3,6 +3,8 @@
 import numpy as np
 import math
 import itertools
+import numba
+from scipy.spatial import cKDTree
 
 from environment import spider
 from environment import wall
@@ -15,6 +17,10 @@ from calculations import dynamics as dyn
 MAX_LIN_STEP = 0.06
 MAX_ROT_STEP = 0.2
 MAX_LIFT_STEP = 0.3
+# Tolerance in radians for treating moving direction as straight up or down the wall.
+MOVING_DIRECTION_TOLERANCE = 1e-3
+# KD-tree of wall's pins, used for searching pins around spider's pose.
+PINS_TREE = cKDTree(wall.PINS)
 
 #region public methods
 def calculateSpiderBodyPath(startPose, goalPose):
@@ -31,21 +37,17 @@ def calculateSpiderBodyPath(startPose, goalPose):
     Returns:
         numpy.ndarray: nx4 array of poses on each step of movenet, where n is number of steps.
     """
-    path = [startPose]
-
     # Move towards goal point.
     distToTravel = np.linalg.norm(np.array(goalPose[:2]) - np.array(startPose[:2]))
-    if distToTravel != 0.0:
-        numberOfSteps = math.ceil(distToTravel / MAX_LIN_STEP) + 1
-        lastPose = path[-1]
-        goalPoseWithStartOrientation = np.copy(goalPose)
-        goalPoseWithStartOrientation[3] = lastPose[3]
-        linPath = np.linspace(lastPose, goalPoseWithStartOrientation, numberOfSteps)
-        for pose in linPath:
-            if (pose - startPose).any():
-                path.append(pose)
-
-    return np.array(path)
+    if distToTravel == 0.0:
+        return np.array([startPose])
+
+    # First pose of linear path is the start pose itself.
+    numberOfSteps = math.ceil(distToTravel / MAX_LIN_STEP) + 1
+    goalPoseWithStartOrientation = np.copy(goalPose)
+    goalPoseWithStartOrientation[3] = startPose[3]
+
+    return np.linspace(startPose, goalPoseWithStartOrientation, numberOfSteps)
 
 def calculateSelectedPinsMaxYDistance(path):
     """Calculate legs positions in global orogin, for each step of the spider's path. Legs should be as stretched as posible in gravity direction.
@@ -56,61 +58,25 @@ def calculateSelectedPinsMaxYDistance(path):
     Returns:
         numpy.ndarray: nx5x3 array of positions of selected pins on each step of the path.
     """
-    pins = wall.createGrid(True)
+    pins = wall.PINS
     selectedPins = np.zeros((len(path), 5, 3))
     searchRadius = 1.0
-    
-    def xCrit(pinPos, legIdx):
-        xDist = pinPos[0] - anchorsPositions[legIdx].flatten()[0]
-
-        if legIdx == upperMiddleLeg:
-            return 1 / (abs(pin[0] - pose[0]) + 10e-5)
-        if legIdx == upperLeftLeg:
-            if pinPos[0] == selectedMiddleLegPin[0]:
-                return -1000
-            return 0 if xDist > 0.0 else 1 / (abs(xDist) + 10e-5)
-        if legIdx == upperRightLeg:
-            if pinPos[0] == selectedMiddleLegPin[0]:
-                return -1000
-            return 0 if xDist < 0.0 else 1 / (abs(xDist) + 10e-5)
-        
-        if legIdx == lowerLeftLeg:
-            return -100 if xDist > 0.0 else 1 / (abs(xDist) + 10e-5)
-        if legIdx == lowerRightLeg:
-            return -100 if xDist < 0.0 else 1 / (abs(xDist) + 10e-5)
+    minDistanceSquared, maxDistanceSquared = np.square(spider.CONSTRAINS[:2])
+    idealLegVectors = np.c_[spider.IDEAL_LEG_VECTORS, np.zeros(spider.NUMBER_OF_LEGS)]
+
+    T_GSs = tf.xyzRpyToMatrices(path)
 
     for step, pose in enumerate(path):
-        pinsInSearchRadius = pins[(np.sum(np.abs(pins - pose[:3])**2, axis = -1))**(0.5) < searchRadius]
-        T_GS = tf.xyzRpyToMatrix(pose)
-        anchorsPositions = np.array([np.dot(T_GS, t)[:,3][:3] for t in spider.T_ANCHORS])
-        selectedPinsOnStep = np.zeros((5, 3))
+        pinsInSearchRadius = pins[PINS_TREE.query_ball_point(pose[:3], searchRadius, return_sorted = True)]
+        T_GS = T_GSs[step]
+        anchorsPositions = np.matmul(T_GS, spider.T_ANCHORS)[:, :3, 3]
+        rotatedIdealLegVectors = (idealLegVectors @ T_GS[:3, :3].T)[:, :2]
 
         upperLeftLeg, upperRightLeg, upperMiddleLeg, lowerLeftLeg, lowerRightLeg = _getLegsRoles(anchorsPositions, pose)
+        legsRoles = np.array([upperLeftLeg, upperRightLeg, -1 if upperMiddleLeg is None else upperMiddleLeg, lowerLeftLeg, lowerRightLeg], dtype = np.int64)
 
-        selectedMiddleLegPin = None
-        for idx, anchorPosition in enumerate(anchorsPositions):
-            potentialPinsForSingleLeg = []
-            for pin in pinsInSearchRadius:
-                if not (spider.CONSTRAINS[0] < np.linalg.norm(anchorPosition[:2] - pin[:2]) < spider.CONSTRAINS[1]):
-                    continue
-                rotatedIdealLegVector = np.dot(T_GS[:3,:3], np.append(spider.IDEAL_LEG_VECTORS[idx], 0))
-                angleBetweenIdealVectorAndPin = mt.calculateSignedAngleBetweenTwoVectors(
-                    rotatedIdealLegVector[:2],
-                    np.array(np.array(pin) - np.array(anchorPosition))[:2])               
-                if not (abs(angleBetweenIdealVectorAndPin) < spider.CONSTRAINS[2]):
-                    continue
-                yAmp = 5 if idx in (upperLeftLeg, upperMiddleLeg, upperRightLeg) else -1
-                criterion = yAmp * (pin[1] - anchorPosition[1]) + \
-                     (1 / (abs(anchorPosition[0] - pin[0]) + 10e-5)) + xCrit(pin, idx)
-
-                potentialPinsForSingleLeg.append([pin, criterion])
-
-            potentialPinsForSingleLeg = np.array(potentialPinsForSingleLeg, dtype = np.object)
-            selectedPinsOnStep[idx] = potentialPinsForSingleLeg[potentialPinsForSingleLeg[:,1].argmax()][0]
-            if idx == 0:
-                selectedMiddleLegPin = selectedPinsOnStep[idx]
-
-        selectedPins[step] = selectedPinsOnStep
+        selectedPins[step] = _selectPinsOnStep(pinsInSearchRadius, anchorsPositions, rotatedIdealLegVectors, pose[0], legsRoles, 
+            minDistanceSquared, maxDistanceSquared, spider.CONSTRAINS[2])
 
     return selectedPins
                 
@@ -140,37 +106,36 @@ def createWalkingInstructions(startPose, goalPose, pinSelectionMethod = calculat
         pinSelectionMethod (function, optional): Method used to calculate selected pins along the way. Defaults to calculateSelectedPinsMaxYDistance.
 
     Returns:
-        tuple: Lists of poses and pins instructions. Pin instruction consists of leg id and pin's position.
+        tuple: Arrays of poses and pins instructions. Pin instruction consists of leg id and pin's position.
     """
-    startPose = np.array(startPose)
-    goalPose = np.array(goalPose)
+    startPose = np.asarray(startPose, dtype = np.float64)
+    goalPose = np.asarray(goalPose, dtype = np.float64)
 
     path = calculateSpiderBodyPath(startPose, goalPose)
     selectedPins = pinSelectionMethod(path)
-    poses = [np.array(startPose)]
-    pinsInstructions = [np.c_[spider.LEGS_IDS, np.array(selectedPins[0])]]
 
     movingDirection = math.atan2(goalPose[0] - startPose[0], goalPose[1] - startPose[1])
-    legMovingOrder = np.array([4, 3, 0, 2, 1]) if movingDirection >= 0.0 else np.array([1, 2, 0, 3, 4])
-    if movingDirection == math.pi:
-        legMovingOrder = np.array([0, 1, 4, 2, 3])
-    elif movingDirection == 0.0:
+    if abs(movingDirection) < MOVING_DIRECTION_TOLERANCE:
         legMovingOrder = np.array([2, 3, 1, 4, 0])
-    legMovingOrder = legMovingOrder.astype(int)
+    elif math.pi - abs(movingDirection) < MOVING_DIRECTION_TOLERANCE:
+        legMovingOrder = np.array([0, 1, 4, 2, 3])
+    elif movingDirection > 0.0:
+        legMovingOrder = np.array([4, 3, 0, 2, 1])
+    else:
+        legMovingOrder = np.array([1, 2, 0, 3, 4])
 
-    def appendToPoseAndPinsInstructions(i, pins):
-        poses.append(path[i])
-        pinsInstructions.append(pins[legMovingOrder])
-        pinsInstructions[-1] = np.c_[legMovingOrder, pinsInstructions[-1]]
+    # Keep first and last step and each step where selected pins change.
+    isStepKept = np.ones(len(selectedPins), dtype = bool)
+    isStepKept[1:-1] = np.any(np.diff(selectedPins[:-1], axis = 0), axis = (1, 2))
+    keptSteps = np.flatnonzero(isStepKept)
+    poses = path[keptSteps]
+    poses[0] = startPose
 
-    for idx, pins in enumerate(selectedPins):
-        if idx == 0:
-            pinsInstructions[-1] = pinsInstructions[-1][legMovingOrder]
-            continue
-        if (np.array(pins) - np.array(selectedPins[idx - 1])).any() or idx == (len(selectedPins) - 1):
-            appendToPoseAndPinsInstructions(idx, pins)
+    pinsInstructions = np.empty((len(keptSteps), spider.NUMBER_OF_LEGS, 4))
+    pinsInstructions[:, :, 0] = legMovingOrder
+    pinsInstructions[:, :, 1:] = selectedPins[keptSteps][:, legMovingOrder]
 
-    return np.array(poses), np.array(pinsInstructions)
+    return poses, pinsInstructions
 
 def modifiedWalkingInstructions(startLegsPositions, endPose):
     """Change first pose and first set of pins instructions with given values.
@@ -221,21 +186,95 @@ def _getLegsRoles(anchorsPositions, pose):
         pose (list): Array of spider's pose in global origin.
 
     Returns:
-        tuple: Indexes of upper-left, upper-right, upper-middle, lower-left and lower-right legs.
+        tuple: Indexes of upper-left, upper-right, upper-middle, lower-left and lower-right legs. Upper-middle leg is None, if there are only two upper legs.
     """
-    upperLegs = np.where(anchorsPositions[:,1] > pose[1])[0]
-    upperLeftIdx = np.where(anchorsPositions[upperLegs,0] == anchorsPositions[upperLegs,0].min())[0]
-    upperRightIdx = np.where(anchorsPositions[upperLegs,0] == anchorsPositions[upperLegs,0].max())[0]
-    upperLeftLeg = upperLegs[upperLeftIdx]
-    upperRightLeg = upperLegs[upperRightIdx]
-    upperMiddleLeg = upperLegs[np.delete(upperLegs, [upperLeftIdx, upperRightIdx])]
+    isUpperLeg = anchorsPositions[:,1] > pose[1]
+    upperLegs = np.flatnonzero(isUpperLeg)
+    upperLegsOrder = upperLegs[np.argsort(anchorsPositions[upperLegs, 0])]
+    upperLeftLeg = upperLegsOrder[0]
+    upperRightLeg = upperLegsOrder[-1]
+    upperMiddleLeg = upperLegsOrder[1] if len(upperLegsOrder) == 3 else None
+
+    lowerLegs = np.flatnonzero(~isUpperLeg)
+    lowerLegsXs = anchorsPositions[lowerLegs, 0]
+    lowerLeftLeg = lowerLegs[lowerLegsXs.argmin()]
+    lowerRightLeg = lowerLegs[lowerLegsXs.argmax()]
 
+    return upperLeftLeg, upperRightLeg, upperMiddleLeg, lowerLeftLeg, lowerRightLeg
 
-    lowerLegs = np.delete(spider.LEGS_IDS, upperLegs)
-    lowerLeftLeg = lowerLegs[np.where(anchorsPositions[lowerLegs, 0] == anchorsPositions[lowerLegs, 0].min())[0]]
-    lowerRightLeg = lowerLegs[np.where(anchorsPositions[lowerLegs, 0] == anchorsPositions[lowerLegs, 0].max())[0]]
+@numba.jit(nopython = True, cache = True)
+def _selectPinsOnStep(pins, anchorsPositions, rotatedIdealLegVectors, poseX, legsRoles, minDistanceSquared, maxDistanceSquared, maxAngle):
+    """Select pin for each leg on single step of the path. Potential pins are filtered by distance from anchor and by angle between ideal leg vector and 
+    anchor-to-pin vector, then the one with the highest criterion is selected. Leg 0 is selected first and its pin is used as a middle leg's pin.
 
-    return upperLeftLeg, upperRightLeg, upperMiddleLeg, lowerLeftLeg, lowerRightLeg
+    Args:
+        pins (list): nx3 array of pins around spider's pose.
+        anchorsPositions (list): 5x3 array of positions of legs' anchors in global origin.
+        rotatedIdealLegVectors (list): 5x2 array of ideal legs vectors in global origin.
+        poseX (float): X coordinate of spider's pose.
+        legsRoles (list): Indexes of upper-left, upper-right, upper-middle, lower-left and lower-right legs. Upper-middle leg is -1, if it does not exist.
+        minDistanceSquared (float): Squared minimal distance between anchor and pin.
+        maxDistanceSquared (float): Squared maximal distance between anchor and pin.
+        maxAngle (float): Maximal angle between ideal leg vector and anchor-to-pin vector.
+
+    Raises:
+        ValueError: If there is no potential pin for a leg or if leg has no role assigned.
+
+    Returns:
+        numpy.ndarray: 5x3 array of selected pins positions.
+    """
+    upperLeftLeg, upperRightLeg, upperMiddleLeg, lowerLeftLeg, lowerRightLeg = legsRoles
+    selectedPins = np.zeros((len(anchorsPositions), 3))
+    for leg in range(len(anchorsPositions)):
+        anchorX = anchorsPositions[leg, 0]
+        anchorY = anchorsPositions[leg, 1]
+        idealX = rotatedIdealLegVectors[leg, 0]
+        idealY = rotatedIdealLegVectors[leg, 1]
+        idealLength = math.sqrt(idealX * idealX + idealY * idealY)
+        yAmp = 5 if leg == upperLeftLeg or leg == upperMiddleLeg or leg == upperRightLeg else -1
+
+        bestPinIdx = -1
+        bestCriterion = 0.0
+        for pinIdx in range(len(pins)):
+            pinX = pins[pinIdx, 0]
+            pinY = pins[pinIdx, 1]
+            xDist = pinX - anchorX
+            yDist = pinY - anchorY
+            distanceSquared = xDist * xDist + yDist * yDist
+            if not minDistanceSquared < distanceSquared < maxDistanceSquared:
+                continue
+            cosine = (xDist * idealX + yDist * idealY) / (idealLength * math.sqrt(distanceSquared))
+            if not np.arccos(np.round(cosine, 4)) < maxAngle:
+                continue
+
+            reciprocalXDist = 1 / (abs(xDist) + 10e-5)
+            if leg == upperMiddleLeg:
+                xCriterion = 1 / (abs(pinX - poseX) + 10e-5)
+            elif leg == upperLeftLeg or leg == upperRightLeg:
+                if pinX == selectedPins[0, 0]:
+                    xCriterion = -1000.0
+                elif (leg == upperLeftLeg and xDist > 0.0) or (leg == upperRightLeg and xDist < 0.0):
+                    xCriterion = 0.0
+                else:
+                    xCriterion = reciprocalXDist
+            elif leg == lowerLeftLeg or leg == lowerRightLeg:
+                if (leg == lowerLeftLeg and xDist > 0.0) or (leg == lowerRightLeg and xDist < 0.0):
+                    xCriterion = -100.0
+                else:
+                    xCriterion = reciprocalXDist
+            else:
+                raise ValueError("Leg has no role assigned.")
+
+            criterion = yAmp * (pinY - anchorY) + (1 / (abs(anchorX - pinX) + 10e-5)) + xCriterion
+            if bestPinIdx == -1 or criterion > bestCriterion:
+                bestPinIdx = pinIdx
+                bestCriterion = criterion
+
+        if bestPinIdx == -1:
+            raise ValueError("Cannot find any potential pin for leg.")
+        selectedPins[leg] = pins[bestPinIdx]
+
+    return selectedPins
 
 def _calculatePotentialPins(path):
     """Calculate all potential pins for each leg on each step of the path.
@@ -247,19 +286,20 @@ def _calculatePotentialPins(path):
         list: nx5xm array of all potential pins for each leg on each step of the path, where n is number of steps on the path and m is a variable, representing
         number of potential pins for each leg on single step and cannot be determined in advance (it can also be different for each leg).
     """
-    pins = wall.createGrid(True)
+    pins = wall.PINS
+    minDistanceSquared, maxDistanceSquared = np.square(spider.CONSTRAINS[:2])
     potentialPins = []
-    for pose in path:
-        T_GS = tf.xyzRpyToMatrix(pose)
-        anchorsPoses = [np.dot(T_GS, t) for t in spider.T_ANCHORS]
+    for pose, T_GS in zip(path, tf.xyzRpyToMatrices(path)):
+        anchorsPoses = np.matmul(T_GS, spider.T_ANCHORS)
         potentialPinsOnStep = []
         for idx, anchorPose in enumerate(anchorsPoses):
             potentialPinsForLeg = []
-            anchorPosition = anchorPose[:,3][:3]
-            for pin in pins:
-                distanceToPin = np.linalg.norm(anchorPosition[0:2] - pin[0:2])
-                if spider.CONSTRAINS[0] < distanceToPin < spider.CONSTRAINS[1]:
-                    rotatedIdealLegVector = np.dot(T_GS[:3,:3], np.append(spider.IDEAL_LEG_VECTORS[idx], 0))
+            anchorPosition = anchorPose[:3, 3]
+            rotatedIdealLegVector = np.matmul(T_GS[:3,:3], np.append(spider.IDEAL_LEG_VECTORS[idx], 0))
+            anchorToPins = pins[:, :2] - anchorPosition[:2]
+            distancesSquared = np.einsum('ij,ij->i', anchorToPins, anchorToPins)
+            for pin, distanceSquared in zip(pins, distancesSquared):
+                if minDistanceSquared < distanceSquared < maxDistanceSquared:
                     anchorToPinGlobal = np.array(np.array(pin) - np.array(anchorPosition))
                     angleBetweenIdealVectorAndPin = mt.calculateSignedAngleBetweenTwoVectors(rotatedIdealLegVector[:2], anchorToPinGlobal[:2])
                     if abs(angleBetweenIdealVectorAndPin) < spider.CONSTRAINS[2]:
@@ -302,16 +342,16 @@ def _calculateIdealPinsFromValidCombinations(pinsCombinations, path):
         numpy.ndarray: nx5x3 array of positions of selected pins for each step of the path, where n is number of steps of the path.
     """
     selectedPins = np.zeros([len(path), spider.NUMBER_OF_LEGS, 3])
-    for step, pose in enumerate(path):
-        T_GS = tf.xyzRpyToMatrix(pose)
-        anchorsPoses = [np.dot(T_GS, t) for t in spider.T_ANCHORS]
-        gravityVectorInSpider = np.dot(T_GS[:3,:3], np.array([0, -1, 0]))
+    T_GSs = tf.xyzRpyToMatrices(path)
+    for step, T_GS in enumerate(T_GSs):
+        anchorsPoses = np.matmul(T_GS, spider.T_ANCHORS)
+        gravityVectorInSpider = np.matmul(T_GS[:3,:3], np.array([0, -1, 0]))
         rgValuesSumArray = np.zeros(len(pinsCombinations[step]))
         for combIdx, pins in enumerate(pinsCombinations[step]):
             rgValuesSum = 0
             for legId, pin in enumerate(pins):
-                anchorToPinGlobal = np.array(np.array(pin) - np.array(anchorsPoses[legId][:,3][:3]), dtype = np.float32)
-                anchorToPinLegLocal = np.dot(np.linalg.inv(anchorsPoses[legId][:3,:3]), anchorToPinGlobal)
+                anchorToPinGlobal = np.array(np.array(pin) - np.array(anchorsPoses[legId][:3, 3]), dtype = np.float32)
+                anchorToPinLegLocal = np.linalg.solve(anchorsPoses[legId][:3,:3], anchorToPinGlobal)
                 jointsValues = kin.legInverseKinematics(anchorToPinLegLocal)
                 rgValue = dyn.getForceEllipsoidLengthInGivenDirection(legId, jointsValues, gravityVectorInSpider)
                 rgValuesSum += rgValue
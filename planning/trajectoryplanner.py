@@ -30,9 +30,50 @@ def getTrajectory(legCurrentPosition, legGoalPosition, duration, trajectoryType)
         return np.append(firstPositionTrajectory, secondPositionTrajectory, axis = 0), np.append(firstVelocityTrajectory, secondVelocityTrajectory, axis = 0), np.append(firstAccelerationTrajectory, secondAccelerationTrajectory, axis = 0)
 
     return _calculateTrajectoryWrapper(legCurrentPosition, legGoalPosition, duration, trajectoryType)
+
+def getTrajectories(legsCurrentPositions, legsGoalPositions, duration, trajectoryType):
+    """Get trajectories for simultaneous movements of multiple legs with the same duration and trajectory type. Minimum jerk trajectories are calculated
+    for all legs at once, unless any of the movements goes through point X = 0 and has to be split (see getTrajectory). Split movements can be one step
+    shorter than the others, because each of their halves is rounded to whole steps. Such legs hold their goal position for remaining steps.
+
+    Args:
+        legsCurrentPositions (list): nx3 array of legs' current positions, where n is number of legs.
+        legsGoalPositions (list): nx3 array of legs' goal positions, where n is number of legs.
+        duration (float): Desired duration of the movements.
+        trajectoryType (str): Type of trajectory.
+
+    Returns:
+        tuple: Three nxmx3 arrays of position, velocity and acceleration trajectories, where n is number of legs and m is the number of steps in trajectory.
+    """
+    legsCurrentPositions = np.array(legsCurrentPositions, dtype = np.float32)
+    legsGoalPositions = np.array(legsGoalPositions, dtype = np.float32)
+
+    isSplitMovement = np.sign(legsCurrentPositions[:, 0]) * np.sign(legsGoalPositions[:, 0]) < 0
+    if trajectoryType == config.MINJERK_TRAJECTORY and not isSplitMovement.any():
+        return _minJerkTrajectories(legsCurrentPositions, legsGoalPositions, duration)
+
+    trajectories = [getTrajectory(start, goal, duration, trajectoryType) for start, goal in zip(legsCurrentPositions, legsGoalPositions)]
+    numberOfSteps = max(len(trajectory[0]) for trajectory in trajectories)
+    positions = np.array([_holdLastStep(trajectory[0][:, :3], numberOfSteps) for trajectory in trajectories], dtype = np.float32)
+    velocities = np.array([_holdLastStep(trajectory[1][:, :3], numberOfSteps) for trajectory in trajectories], dtype = np.float32)
+    accelerations = np.array([_holdLastStep(trajectory[2][:, :3], numberOfSteps) for trajectory in trajectories], dtype = np.float32)
+
+    return positions, velocities, accelerations
 #endregion
 
 #region private methods
+def _holdLastStep(trajectory, numberOfSteps):
+    """Extend trajectory to given number of steps by repeating its last step. Trajectories end at rest, so repeated step holds the goal position.
+
+    Args:
+        trajectory (numpy.ndarray): mx3 array of positions, velocities or accelerations, where m is not larger than numberOfSteps.
+        numberOfSteps (int): Desired number of steps.
+
+    Returns:
+        numpy.ndarray: numberOfStepsx3 array of extended trajectory.
+    """
+    return np.pad(trajectory, ((0, numberOfSteps - len(trajectory)), (0, 0)), mode = 'edge')
+
 def _calculateTrajectoryWrapper(start, goal, duration, trajectoryType):
     """Wrapper for calcuating trajectories of desired type.
 
@@ -111,6 +152,37 @@ def _minJerkTrajectory(startPose, goalPose, duration):
 
     return trajectory, velocities, accelerations
 
+def _minJerkTrajectories(startPositions, goalPositions, duration):
+    """Calculate minimum jerk trajectories of positions, velocities and accelerations for multiple pairs of points at once.
+
+    Args:
+        startPositions (numpy.ndarray): nx3 array of starting positions.
+        goalPositions (numpy.ndarray): nx3 array of goal positions.
+        duration (float): Duration of trajectories.
+
+    Raises:
+        ValueError: If value of duration parameter is smaller or equal to 0.
+
+    Returns:
+        tuple: Three nxmx3 arrays of position, velocity and acceleration trajectories, where n is number of given pairs of points and m is the number of steps in trajectory.
+    """
+    if duration <= 0:
+        raise ValueError("Movement duration cannot be shorter than 0 seconds.")
+
+    timeStep = 1 / config.CONTROLLER_FREQUENCY
+    numberOfSteps = int(duration / timeStep)
+    t = np.linspace(0, duration, numberOfSteps)[:, np.newaxis]
+    param = t / duration
+
+    startPositions = startPositions[:, np.newaxis, :]
+    startToGoal = goalPositions[:, np.newaxis, :] - startPositions
+
+    positions = startPositions + startToGoal * (6 * param**5 - 15 * param**4 + 10 * param**3)
+    velocities = (30 * t**2 * (duration - t)**2 * startToGoal) / duration**5
+    accelerations = (60 * startToGoal * t * (2 * t**2 - 3 * t * duration + duration**2)) / duration**5
+
+    return positions.astype(np.float32), velocities.astype(np.float32), accelerations.astype(np.float32)
+
 def _bezierTrajectory(startPosition, goalPosition, duration):
     """Calculate cubic bezier trajectory between start and goal point with fixed intermediat control points.
 
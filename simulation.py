@@ -1,5 +1,6 @@
 """ Module for simulating Green Wall environment and Spiders movement. """
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PatchCollection
 import numpy as np
 
 import environment.wall as wall
@@ -51,73 +52,47 @@ class Plotter:
         self.plotWallGrid()
         self.plotSpidersPath(path)
 
+        # Create all moving components once and only update their positions on each step.
+        spiderBody = plt.Circle((0.0, 0.0), spider.BODY_RADIUS, color = "blue")
+        self.board.add_patch(spiderBody)
+        firstAnchor = plt.Circle((0.0, 0.0), 0.03, color = "red")
+        self.board.add_patch(firstAnchor)
+        legs = LineCollection([], colors = 'g')
+        self.board.add_collection(legs)
+        # Mark 1st leg with red tip and 2nd leg with yellow (to check legs orientation)
+        legTips = [plt.Circle((0.0, 0.0), 0.02, color = color) for color in ("red", "yellow", "orange", "orange", "orange")]
+        for legTip in legTips:
+            self.board.add_patch(legTip)
+        potentialPinsColors = ('red', 'yellow', 'green', 'magenta', 'blue')
+        potentialPinsRadiuses = (0.1, 0.08, 0.06, 0.04, 0.04)
+
         # Loop through each step on path.
         for idx, pose in enumerate(path):
-            # Plot spiders body on each step.
-            spiderBody = plt.Circle((pose[0], pose[1]), spider.BODY_RADIUS, color = "blue")
-            self.board.add_patch(spiderBody) 
+            spiderBody.center = (pose[0], pose[1])
 
             if allPotentialPins is not None:
-                potentialCircles = []
-                for i, potentials in enumerate(allPotentialPins[idx]):
-                    if i == 0:
-                        c = 'red'
-                        r = 0.1
-                    elif i == 1:
-                        c = 'yellow'
-                        r = 0.08
-                    elif i == 2:
-                        c = 'green'
-                        r = 0.06
-                    elif i == 3:
-                        c = 'magenta'
-                        r = 0.04
-                    elif i == 4:
-                        c = 'blue'
-                        r = 0.04
-                    for pin in potentials:
-                        potentialCircle = plt.Circle((pin[0], pin[1]), r, color = c)
-                        self.board.add_patch(potentialCircle)
-                        potentialCircles.append(potentialCircle)
+                potentialCircles = [plt.Circle((pin[0], pin[1]), potentialPinsRadiuses[i], color = potentialPinsColors[i]) 
+                    for i, potentials in enumerate(allPotentialPins[idx]) for pin in potentials]
+                potentialCirclesCollection = PatchCollection(potentialCircles, match_original = True)
+                self.board.add_collection(potentialCirclesCollection)
 
             # Plot all legs and their tips on each step.
-            legs = []
-            legTips = []    
-            for i in range(len(legPositions[idx])):
-                if len(pose) > 2:
-                    T_GA = tf.xyzRpyToMatrix(pose)
-                    anchorPosition = np.dot(T_GA, spider.T_ANCHORS[i])[:,3][:3]
-                    xVals = [anchorPosition[0], legPositions[idx][i][0]]
-                    yVals = [anchorPosition[1], legPositions[idx][i][1]]
-                else:
-                    xVals = [pose[0] + spider.LEG_ANCHORS[i][0], legPositions[idx][i][0]]
-                    yVals = [pose[1] + spider.LEG_ANCHORS[i][1], legPositions[idx][i][1]]
-                legs.append(self.board.plot(xVals, yVals, 'g')[0])
-                # Mark 1st leg with red tip and 2nd leg with yellow (to check legs orientation)
-                color = "orange"
-                if i == 0:
-                    color = "red"
-                    firstAnchor = plt.Circle((anchorPosition[0], anchorPosition[1]), 0.03, color = "red")
-                    self.board.add_patch(firstAnchor)
-                elif i == 1:
-                    color = "yellow"
-                legTip = plt.Circle((legPositions[idx][i]), 0.02, color = color)
-                self.board.add_patch(legTip)
-                legTips.append(legTip)
+            if len(pose) > 2:
+                anchorsPositions = np.matmul(tf.xyzRpyToMatrix(pose), spider.T_ANCHORS)[:, :2, 3]
+            else:
+                anchorsPositions = pose[:2] + spider.LEG_ANCHORS
+            legsPositions = np.asarray(legPositions[idx])[:, :2]
+            legs.set_segments(np.stack((anchorsPositions, legsPositions), axis = 1))
+            firstAnchor.center = anchorsPositions[0]
+            for legTip, legPosition in zip(legTips, legsPositions):
+                legTip.center = legPosition
 
             plt.draw()
             plt.pause(0.2)
 
-            # Remove all drawn components from board, unless spider is at the end of the path.
-            if (pose - path[-1]).any():
-                if allPotentialPins is not None:
-                    for potentialCircle in potentialCircles:
-                        potentialCircle.remove()
-                spiderBody.remove()
-                firstAnchor.remove()
-                for i in range(len(legs)):
-                    legTips[i].remove()
-                    legs[i].remove()
+            # Remove potential pins from board, unless spider is at the end of the path.
+            if allPotentialPins is not None and not np.array_equal(pose, path[-1]):
+                potentialCirclesCollection.remove()
         
         plt.show()
     
@@ -134,24 +109,22 @@ class Plotter:
         legs = list(range(spider.NUMBER_OF_LEGS))
 
         def plotLegs(step, pose, inLoopPause, deleteLegs):
+            if len(pose) > 2:
+                anchorsPositions = np.matmul(tf.xyzRpyToMatrix(pose), spider.T_ANCHORS)[:, :2, 3]
+            else:
+                anchorsPositions = pose[:2] + spider.LEG_ANCHORS
             for i in range(len(pinsInstructions[step])):
                 legIdx = int(pinsInstructions[step][i][0])
                 legPosition = pinsInstructions[step][i][1:]
 
                 if deleteLegs:
                     legs[legIdx].remove()
-                if len(pose) > 2:
-                    T_GA = tf.xyzRpyToMatrix(pose)
-                    anchorPosition = np.dot(T_GA, spider.T_ANCHORS[legIdx])[:,3][:3]
-                    xVals = [anchorPosition[0], legPosition[0]]
-                    yVals = [anchorPosition[1], legPosition[1]]
-                else:
-                    xVals = [pose[0] + spider.LEG_ANCHORS[legIdx][0], legPosition[0]]
-                    yVals = [pose[1] + spider.LEG_ANCHORS[legIdx][1], legPosition[1]]
+                xVals = [anchorsPositions[legIdx][0], legPosition[0]]
+                yVals = [anchorsPositions[legIdx][1], legPosition[1]]
                 legs[legIdx] = self.board.plot(xVals, yVals, 'g')[0]
                 if inLoopPause:
                     plt.draw()
-                    if (legPosition - pinsInstructions[step - 1][i][1:]).any():
+                    if not np.array_equal(legPosition, pinsInstructions[step - 1][i][1:]):
                         plt.pause(0.5)
             if not inLoopPause:
                 plt.draw()
@@ -167,7 +140,7 @@ class Plotter:
                 plotLegs(step - 1, pose, False, True)
                 plotLegs(step, pose, True, True)
 
-            if (pose - path[-1]).any():
+            if not np.array_equal(pose, path[-1]):
                 spiderBody.remove()
   
         plt.show()
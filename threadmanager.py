@@ -1,8 +1,9 @@
 import threading
 import time
+import os
 
 class CustomThread:
-    def run(self, function, threadName, isDaemon, start = True, useKillEvent = True, doPrint = True, funcArgs = ()):
+    def run(self, function, threadName, isDaemon, start = True, useKillEvent = True, doPrint = True, funcArgs = (), niceValue = None):
         """Create and run given function in separate thread. 
 
         Args:
@@ -12,6 +13,8 @@ class CustomThread:
             start (bool, optional): Whether or not to start thread. Defaults to True.
             useKillEvent (bool, optional): Whether or not to use event to kill a thread. Defaults to True.
             funcArgs (tuple, optional): Needed arguments for given function, given as a Tuple. Defaults to ().
+            niceValue (int, optional): Nice value of the thread. Should be given for non-critical threads, so that they do not compete with control threads. 
+            Defaults to None, in which case thread keeps the nice value of the process.
 
         Returns:
             Tuple or Thread: If kill event is used return thread and kill event, otherwise return only thread.
@@ -19,7 +22,13 @@ class CustomThread:
         if useKillEvent:
             killThreadEvent = threading.Event()
             funcArgs = funcArgs + (killThreadEvent, )
-        thread = threading.Thread(target = function, args = funcArgs, name = threadName, daemon = isDaemon)
+        if niceValue is not None:
+            def target(*args):
+                self.__setNiceValue(niceValue, threadName)
+                function(*args)
+        else:
+            target = function
+        thread = threading.Thread(target = target, args = funcArgs, name = threadName, daemon = isDaemon)
         try:
             if start:
                 thread.start()
@@ -32,4 +41,12 @@ class CustomThread:
         
         if useKillEvent:
             return thread, killThreadEvent
-        return thread 
\ No newline at end of file
+        return thread 
+
+    def __setNiceValue(self, niceValue, threadName):
+        """Set nice value of calling thread. If this is not permitted (or not supported), thread keeps running with the nice value of the process.
+        """
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, niceValue)
+        except (AttributeError, OSError) as e:
+            print(f"Cannot set nice value of thread {threadName}, because {e}.")
@@ -9,6 +9,7 @@ class UdpServer:
         self.REMOTE_PORT = 6565
         
         self.addressToSend = addressToSend
+        self.remoteAddress = (self.addressToSend, self.REMOTE_PORT)
         self.udpServerSocket = socket.socket(family = socket.AF_INET, type = socket.SOCK_DGRAM)
         try:
             self.udpServerSocket.bind((self.LOCAL_IP, self.LOCAL_PORT))
@@ -18,6 +19,6 @@ class UdpServer:
         print("UDP Server running.")
     
     def send(self, data):
-        data = np.array(data, dtype = np.float64)
-        bytesToSend = bytearray(data.flatten())
-        self.udpServerSocket.sendto(bytesToSend, (self.addressToSend, self.REMOTE_PORT))
+        # Contiguous float64 array is passed to the socket through buffer protocol, without copying it into intermediate bytes objects.
+        dataToSend = np.ascontiguousarray(data, dtype = np.float64)
+        self.udpServerSocket.sendto(dataToSend, self.remoteAddress)